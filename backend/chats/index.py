@@ -1,8 +1,80 @@
 import json
 import os
+import random
+import time
 import psycopg2
 from psycopg2.extras import RealDictCursor
 
+REPLICA_LAG_QUERY = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn()
+            AND EXISTS (SELECT 1 FROM pg_stat_wal_receiver WHERE pid IS NOT NULL) THEN 0
+        ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp())
+    END AS lag
+"""
+
+# Реплики, которые недавно были недоступны или отставали: DSN -> время, до которого их пропускаем.
+# Тёплые экземпляры функции сохраняют состояние модуля между вызовами.
+replica_skip_until = {}
+
+# Сколько проверок подряд реплика отставала. После простоя первая запись на короткое время
+# показывает отставание в часы, поэтому пропускаем реплику только со второй неудачной проверки.
+replica_lag_strikes = {}
+
+def is_sticky_to_primary(event: dict) -> bool:
+    '''Пользователь недавно писал в БД — читаем с основной, чтобы он увидел свои изменения'''
+    last_write_age = (event.get('headers') or {}).get('X-Last-Write-Age')
+    if last_write_age is None:
+        return False
+    try:
+        age_ms = int(last_write_age)
+    except ValueError:
+        return False
+    return age_ms < float(os.environ.get('PRIMARY_STICKY_SECONDS', '5')) * 1000
+
+def get_connection(event: dict, read_only: bool):
+    '''Подключение к реплике для чтения, к основной БД для записи и при отставании реплик'''
+    replica_urls = [url.strip() for url in os.environ.get('DATABASE_REPLICA_URLS', '').split(',') if url.strip()]
+    
+    if not read_only or not replica_urls or is_sticky_to_primary(event):
+        return psycopg2.connect(os.environ['DATABASE_URL'])
+    
+    max_lag = float(os.environ.get('REPLICA_MAX_LAG_SECONDS', '5'))
+    connect_timeout = max(1, round(float(os.environ.get('REPLICA_CONNECT_TIMEOUT_SECONDS', '2'))))
+    retry_after = float(os.environ.get('REPLICA_RETRY_SECONDS', '30'))
+    now = time.monotonic()
+    replica_urls = [url for url in replica_urls if replica_skip_until.get(url, 0) <= now]
+    random.shuffle(replica_urls)
+    
+    for replica_url in replica_urls:
+        try:
+            conn = psycopg2.connect(replica_url, connect_timeout=connect_timeout)
+        except psycopg2.Error:
+            replica_skip_until[replica_url] = now + retry_after
+            continue
+        
+        try:
+            with conn.cursor() as cur:
+                cur.execute(REPLICA_LAG_QUERY)
+                lag = cur.fetchone()[0]
+        except psycopg2.Error:
+            conn.close()
+            replica_skip_until[replica_url] = now + retry_after
+            continue
+        
+        if lag is not None and lag <= max_lag:
+            replica_skip_until.pop(replica_url, None)
+            replica_lag_strikes.pop(replica_url, None)
+            return conn
+        conn.close()
+        replica_lag_strikes[replica_url] = replica_lag_strikes.get(replica_url, 0) + 1
+        if replica_lag_strikes[replica_url] >= 2:
+            replica_skip_until[replica_url] = now + retry_after
+            replica_lag_strikes.pop(replica_url, None)
+    
+    return psycopg2.connect(os.environ['DATABASE_URL'])
+
 def handler(event: dict, context) -> dict:
     '''API для управления чатами'''
     method = event.get('httpMethod', 'GET')
@@ -13,14 +85,15 @@ def handler(event: dict, context) -> dict:
             'headers': {
                 'Access-Control-Allow-Origin': '*',
                 'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type, X-User-Id'
+                'Access-Control-Allow-Headers': 'Content-Type, X-User-Id, X-Last-Write-Age',
+                'Access-Control-Max-Age': '86400'
             },
             'body': '',
             'isBase64Encoded': False
         }
     
     try:
-        conn = psycopg2.connect(os.environ['DATABASE_URL'])
+        conn = get_connection(event, read_only=method == 'GET')
         cur = conn.cursor(cursor_factory=RealDictCursor)
         
         if method == 'GET':
@@ -6,6 +6,24 @@ const API_URLS = {
   upload: 'https://functions.poehali.dev/1b760d3d-9050-46b2-b241-ea62855a5d16',
 };
 
+const LAST_WRITE_KEY = 'spektr_last_write_at';
+const LAST_WRITE_WINDOW_MS = 10000;
+
+const markWrite = () => localStorage.setItem(LAST_WRITE_KEY, String(Date.now()));
+
+const readHeaders = (headers: Record<string, string> = {}) => {
+  const lastWriteAt = Number(localStorage.getItem(LAST_WRITE_KEY));
+  if (!lastWriteAt) return headers;
+
+  const lastWriteAge = Date.now() - lastWriteAt;
+  if (lastWriteAge < LAST_WRITE_WINDOW_MS) {
+    headers['X-Last-Write-Age'] = String(lastWriteAge);
+  } else {
+    localStorage.removeItem(LAST_WRITE_KEY);
+  }
+  return headers;
+};
+
 export const api = {
   async register(username: string, email: string, password: string, firstName: string, lastName?: string) {
     const res = await fetch(API_URLS.auth, {
@@ -27,10 +45,10 @@ export const api = {
 
   async searchUsers(query: string, userId?: number) {
     const params = new URLSearchParams({ search: query });
-    const headers: HeadersInit = {};
+    const headers: Record<string, string> = {};
     if (userId) headers['X-User-Id'] = String(userId);
     
-    const res = await fetch(`${API_URLS.users}?${params}`, { headers });
+    const res = await fetch(`${API_URLS.users}?${params}`, { headers: readHeaders(headers) });
     return res.json();
   },
 
@@ -40,6 +58,7 @@ export const api = {
       headers: { 'Content-Type': 'application/json' },
       body: JSON.stringify({ userId, ...updates }),
     });
+    markWrite();
     return res.json();
   },
 
@@ -49,12 +68,13 @@ export const api = {
       headers: { 'Content-Type': 'application/json' },
       body: JSON.stringify({ action: 'block', blockerId, blockedId }),
     });
+    markWrite();
     return res.json();
   },
 
   async getChats(userId: number) {
     const res = await fetch(API_URLS.chats, {
-      headers: { 'X-User-Id': String(userId) },
+      headers: readHeaders({ 'X-User-Id': String(userId) }),
     });
     return res.json();
   },
@@ -65,12 +85,13 @@ export const api = {
       headers: { 'Content-Type': 'application/json' },
       body: JSON.stringify({ user1Id, user2Id }),
     });
+    markWrite();
     return res.json();
   },
 
   async getMessages(chatId: number) {
     const params = new URLSearchParams({ chatId: String(chatId) });
-    const res = await fetch(`${API_URLS.messages}?${params}`);
+    const res = await fetch(`${API_URLS.messages}?${params}`, { headers: readHeaders() });
     return res.json();
   },
 
@@ -80,6 +101,7 @@ export const api = {
       headers: { 'Content-Type': 'application/json' },
       body: JSON.stringify({ chatId, senderId, text }),
     });
+    markWrite();
     return res.json();
   },
 